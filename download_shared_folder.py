@@ -9,16 +9,19 @@ Google Drive共有フォルダからファイルをダウンロードするス
 import os
 import argparse
 import mimetypes
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
-import io
 
 
 # Google Drive APIのスコープ
@@ -28,6 +31,34 @@ SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.json'
 
+# HTTPリクエストのタイムアウト（秒）
+HTTP_TIMEOUT = 60
+
+# 一時的なエラー（429/5xx）時の最大リトライ回数（指数バックオフで再試行）
+NUM_RETRIES = 5
+
+# 再試行の対象とするHTTPステータスコード
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# バッチリクエスト1回あたりの最大リクエスト数（多すぎるとHTTP 500になりやすい）
+BATCH_SIZE = 25
+
+# ダウンロード時のチャンクサイズ（MB）
+# ファイルに直接書き込むため、大きくしてもメモリ使用量はチャンク1つ分で済みます
+DEFAULT_CHUNK_SIZE_MB = 8
+
+# 同時ダウンロード数（Drive APIのユーザー単位のレート制限を考慮）
+DEFAULT_WORKERS = 8
+
+# 同時に実行するフォルダ一覧取得（バッチリクエスト）の数
+LIST_WORKERS = 8
+
+# 一覧取得済みでダウンロード待ちのファイル数の上限
+MAX_PENDING_DOWNLOADS = 256
+
+# ワーカースレッドごとのAPIサービス
+_thread_local = threading.local()
+
 
 def authenticate_google_drive() -> Optional[Credentials]:
     """
@@ -75,6 +106,24 @@ def authenticate_google_drive() -> Optional[Credentials]:
     return creds
 
 
+def build_drive_service(creds: Credentials):
+    """
+    Google Drive APIサービスを構築します。
+    
+    認証済みのHTTPクライアントを1つだけ作成し、以降のすべての
+    API呼び出しで同じ接続（TLSセッション）を使い回します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    # ライブラリに同梱されたディスカバリードキュメントを使い、起動時の取得通信を省く
+    return build('drive', 'v3', http=http, static_discovery=True)
+
+
 def get_folder_info(service, folder_id: str) -> Optional[dict]:
     """
     フォルダの情報を取得します。
@@ -89,8 +138,8 @@ def get_folder_info(service, folder_id: str) -> Optional[dict]:
     try:
         folder = service.files().get(
             fileId=folder_id,
-            fields='id,name,mimeType,parents'
-        ).execute()
+            fields='id,name,mimeType'
+        ).execute(num_retries=NUM_RETRIES)
         
         if folder.get('mimeType') != 'application/vnd.google-apps.folder':
             print(f"エラー: 指定されたIDはフォルダではありません: {folder.get('name')}")
@@ -110,24 +159,28 @@ def list_folder_contents(service, folder_id: str, page_token=None) -> list:
     Args:
         service: Google Drive APIサービス
         folder_id: フォルダID
-        page_token: ページネーション用トークン
+        page_token: 取得を開始するページのトークン
     
     Returns:
         list: ファイルとフォルダのリスト
     """
     try:
-        results = service.files().list(
-            q=f"'{folder_id}' in parents and trashed=false",
-            pageSize=1000,
-            fields="nextPageToken, files(id, name, mimeType, size, modifiedTime)",
-            pageToken=page_token
-        ).execute()
+        items = []
         
-        items = results.get('files', [])
-        
-        # 次のページがある場合は再帰的に取得
-        if results.get('nextPageToken'):
-            items.extend(list_folder_contents(service, folder_id, results.get('nextPageToken')))
+        # 次のページがなくなるまで取得
+        while True:
+            results = service.files().list(
+                q=f"'{folder_id}' in parents and trashed=false",
+                pageSize=1000,
+                fields="nextPageToken, files(id, name, mimeType, size, modifiedTime)",
+                pageToken=page_token
+            ).execute(num_retries=NUM_RETRIES)
+            
+            items.extend(results.get('files', []))
+            
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
         
         return items
     
@@ -136,7 +189,62 @@ def list_folder_contents(service, folder_id: str, page_token=None) -> list:
         return []
 
 
-def download_file(service, file_id: str, file_name: str, local_path: str) -> bool:
+def list_folders_contents(service, folder_ids: List[str]) -> Dict[str, list]:
+    """
+    複数フォルダの内容をバッチリクエストでまとめて取得します。
+    
+    Args:
+        service: Google Drive APIサービス
+        folder_ids: フォルダIDのリスト
+    
+    Returns:
+        Dict[str, list]: フォルダIDごとのファイルとフォルダのリスト
+    """
+    contents = {}
+    
+    for start in range(0, len(folder_ids), BATCH_SIZE):
+        page_tokens = {}
+        retry_ids = []
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                if isinstance(exception, HttpError) and exception.resp.status in RETRYABLE_STATUS_CODES:
+                    # 一時的なエラーは後で個別に再取得
+                    retry_ids.append(request_id)
+                else:
+                    print(f"フォルダ内容の取得に失敗しました: {exception}")
+                    contents[request_id] = []
+                return
+            
+            contents[request_id] = response.get('files', [])
+            if response.get('nextPageToken'):
+                page_tokens[request_id] = response['nextPageToken']
+        
+        batch = service.new_batch_http_request(callback=callback)
+        for folder_id in folder_ids[start:start + BATCH_SIZE]:
+            batch.add(
+                service.files().list(
+                    q=f"'{folder_id}' in parents and trashed=false",
+                    pageSize=1000,
+                    fields="nextPageToken, files(id, name, mimeType, size, modifiedTime)"
+                ),
+                request_id=folder_id
+            )
+        batch.execute()
+        
+        # 一時的なエラーになったフォルダはリトライ付きで個別に取得
+        for folder_id in retry_ids:
+            contents[folder_id] = list_folder_contents(service, folder_id)
+        
+        # 2ページ目以降はフォルダごとに取得
+        for folder_id, page_token in page_tokens.items():
+            contents[folder_id].extend(list_folder_contents(service, folder_id, page_token))
+    
+    return contents
+
+
+def download_file(service, file_id: str, file_name: str, local_path: str,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE_MB * 1024 * 1024) -> bool:
     """
     ファイルをダウンロードします。
     
@@ -145,13 +253,17 @@ def download_file(service, file_id: str, file_name: str, local_path: str) -> boo
         file_id: ファイルID
         file_name: ファイル名
         local_path: ローカル保存先パス
+        chunk_size: 1回のリクエストで取得するバイト数
     
     Returns:
         bool: 成功時はTrue、失敗時はFalse
     """
     try:
         # ファイルのメタデータを取得
-        file_metadata = service.files().get(fileId=file_id).execute()
+        file_metadata = service.files().get(
+            fileId=file_id,
+            fields='mimeType'
+        ).execute(num_retries=NUM_RETRIES)
         
         # Google Workspaceファイル（ドキュメント、スプレッドシート等）の場合は
         # 適切な形式でエクスポート
@@ -175,19 +287,25 @@ def download_file(service, file_id: str, file_name: str, local_path: str) -> boo
             # 通常のファイルの場合は直接ダウンロード
             request = service.files().get_media(fileId=file_id)
         
-        # ファイルをダウンロード
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-            if status:
-                print(f"ダウンロード進捗: {int(status.progress() * 100)}%")
-        
-        # ファイルを保存
-        with open(local_path, 'wb') as f:
-            f.write(fh.getvalue())
+        # ファイルをダウンロード（受信したチャンクを一時ファイルに順次書き込む）
+        part_path = local_path + '.part'
+        try:
+            with open(part_path, 'wb') as fh:
+                downloader = MediaIoBaseDownload(fh, request, chunksize=chunk_size)
+                
+                done = False
+                while done is False:
+                    status, done = downloader.next_chunk(num_retries=NUM_RETRIES)
+                    if status:
+                        print(f"ダウンロード進捗: {int(status.progress() * 100)}%")
+            
+            # ダウンロードが完了してから置き換え、既存のファイルを途中の状態や削除された状態にしない
+            os.replace(part_path, local_path)
+        except Exception:
+            # 途中まで書き込んだファイルは残さない
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
         
         print(f"ファイル '{file_name}' をダウンロードしました: {local_path}")
         return True
@@ -200,50 +318,181 @@ def download_file(service, file_id: str, file_name: str, local_path: str) -> boo
         return False
 
 
-def download_folder_recursively(service, folder_id: str, folder_name: str, local_base_path: str) -> bool:
+def get_thread_service(creds: Credentials):
+    """
+    現在のスレッド用のGoogle Drive APIサービスを取得します。
+    
+    httplib2はスレッドセーフではないため、ワーカースレッドごとに
+    サービスを1つ構築して使い回します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    service = getattr(_thread_local, 'service', None)
+    if service is None:
+        service = build_drive_service(creds)
+        _thread_local.service = service
+    return service
+
+
+def download_file_in_thread(creds: Credentials, file_id: str, file_name: str, local_path: str,
+                            chunk_size: int) -> bool:
+    """
+    ワーカースレッド上でファイルをダウンロードします。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+        file_id: ファイルID
+        file_name: ファイル名
+        local_path: ローカル保存先パス
+        chunk_size: 1回のリクエストで取得するバイト数
+    
+    Returns:
+        bool: 成功時はTrue、失敗時はFalse
+    """
+    return download_file(get_thread_service(creds), file_id, file_name, local_path, chunk_size)
+
+
+def list_folders_contents_in_thread(creds: Credentials, folder_ids: List[str]) -> Dict[str, list]:
+    """
+    ワーカースレッド上で複数フォルダの内容をまとめて取得します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+        folder_ids: フォルダIDのリスト
+    
+    Returns:
+        Dict[str, list]: フォルダIDごとのファイルとフォルダのリスト
+    """
+    return list_folders_contents(get_thread_service(creds), folder_ids)
+
+
+def iter_download_jobs(service, folder_id: str, folder_name: str, local_base_path: str,
+                       creds: Credentials) -> Iterator[Tuple[str, str, str]]:
+    """
+    フォルダ階層を走査し、ローカルフォルダを作成しながらダウンロード対象を返します。
+    
+    見つかったサブフォルダはバッチリクエストにまとめ、複数のスレッドで
+    並行して一覧取得します。一覧取得が終わったフォルダから順に結果を返すため、
+    呼び出し側は残りの一覧取得と並行してダウンロードを進められます。
+    
+    Args:
+        service: Google Drive APIサービス（ルートフォルダの一覧取得用）
+        folder_id: フォルダID
+        folder_name: フォルダ名
+        local_base_path: ローカル保存先のベースパス
+        creds: 認証済みのクレデンシャル（ワーカースレッドのサービス構築用）
+    
+    Yields:
+        Tuple[str, str, str]: (ファイルID, ファイル名, ローカル保存先パス)
+    """
+    root_path = os.path.join(local_base_path, folder_name)
+    os.makedirs(root_path, exist_ok=True)
+    print(f"フォルダ '{folder_name}' を作成しました: {root_path}")
+    
+    # 一覧取得中のフォルダIDとローカルパスの対応
+    local_paths = {folder_id: root_path}
+    
+    # ダウンロード対象にしたファイルのローカルパス
+    file_paths = set()
+    
+    with ThreadPoolExecutor(max_workers=LIST_WORKERS) as executor:
+        futures = set()
+        contents = list_folders_contents(service, [folder_id])
+        
+        while True:
+            subfolder_ids = []
+            
+            for current_id, items in contents.items():
+                local_folder_path = local_paths.pop(current_id)
+                
+                for item in items:
+                    item_name = item['name']
+                    item_id = item['id']
+                    item_type = item['mimeType']
+                    
+                    if item_type == 'application/vnd.google-apps.folder':
+                        # 複数の親を持つフォルダは一度だけ処理
+                        if item_id in local_paths:
+                            continue
+                        
+                        # ローカルフォルダを作成
+                        sub_path = os.path.join(local_folder_path, item_name)
+                        os.makedirs(sub_path, exist_ok=True)
+                        print(f"フォルダ '{item_name}' を作成しました: {sub_path}")
+                        
+                        local_paths[item_id] = sub_path
+                        subfolder_ids.append(item_id)
+                    else:
+                        local_file_path = os.path.join(local_folder_path, item_name)
+                        
+                        # 同じパスになるファイルが複数ある場合は最初のものだけをダウンロード
+                        # （並列に同じファイルへ書き込まないようにする）
+                        if local_file_path in file_paths:
+                            print(f"同名のファイルがあるためスキップしました: {local_file_path}")
+                            continue
+                        file_paths.add(local_file_path)
+                        
+                        yield item_id, item_name, local_file_path
+            
+            # 見つかったサブフォルダの一覧取得をすぐに開始
+            for start in range(0, len(subfolder_ids), BATCH_SIZE):
+                futures.add(executor.submit(
+                    list_folders_contents_in_thread, creds, subfolder_ids[start:start + BATCH_SIZE]
+                ))
+            
+            if not futures:
+                break
+            
+            # いずれかの一覧取得が終わるまで待つ
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            contents = {}
+            for future in done:
+                contents.update(future.result())
+
+
+def download_folder_recursively(service, folder_id: str, folder_name: str, local_base_path: str,
+                                creds: Credentials, max_workers: int = DEFAULT_WORKERS,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE_MB * 1024 * 1024) -> bool:
     """
     フォルダを再帰的にダウンロードします。
     
+    フォルダ階層を走査しながら、一覧取得できたファイルから順に
+    複数のワーカースレッドで並列にダウンロードします。
+    
     Args:
         service: Google Drive APIサービス
         folder_id: フォルダID
         folder_name: フォルダ名
         local_base_path: ローカル保存先のベースパス
+        creds: 認証済みのクレデンシャル（ワーカースレッドのサービス構築用）
+        max_workers: 同時ダウンロード数
+        chunk_size: 1回のリクエストで取得するバイト数
     
     Returns:
         bool: 成功時はTrue、失敗時はFalse
     """
     try:
-        # ローカルフォルダを作成
-        local_folder_path = os.path.join(local_base_path, folder_name)
-        os.makedirs(local_folder_path, exist_ok=True)
-        
-        print(f"フォルダ '{folder_name}' を作成しました: {local_folder_path}")
+        futures = []
         
-        # フォルダ内のアイテムを取得
-        items = list_folder_contents(service, folder_id)
+        # ダウンロード待ちが溜まりすぎないよう、一覧取得側を待たせる
+        pending_slots = threading.BoundedSemaphore(MAX_PENDING_DOWNLOADS)
         
-        success_count = 0
-        total_count = len(items)
-        
-        for item in items:
-            item_name = item['name']
-            item_id = item['id']
-            item_type = item['mimeType']
-            
-            if item_type == 'application/vnd.google-apps.folder':
-                # サブフォルダの場合は再帰的に処理
-                success = download_folder_recursively(
-                    service, item_id, item_name, local_folder_path
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for item_id, item_name, local_file_path in iter_download_jobs(
+                    service, folder_id, folder_name, local_base_path, creds):
+                pending_slots.acquire()
+                future = executor.submit(
+                    download_file_in_thread, creds, item_id, item_name, local_file_path, chunk_size
                 )
-                if success:
-                    success_count += 1
-            else:
-                # ファイルの場合はダウンロード
-                local_file_path = os.path.join(local_folder_path, item_name)
-                success = download_file(service, item_id, item_name, local_file_path)
-                if success:
-                    success_count += 1
+                future.add_done_callback(lambda _: pending_slots.release())
+                futures.append(future)
+        
+        success_count = sum(1 for future in futures if future.result())
+        total_count = len(futures)
         
         print(f"フォルダ '{folder_name}' の処理完了: {success_count}/{total_count} 成功")
         return success_count > 0
@@ -253,6 +502,22 @@ def download_folder_recursively(service, folder_id: str, folder_name: str, local
         return False
 
 
+def positive_int(value: str) -> int:
+    """
+    コマンドライン引数を1以上の整数に変換します。
+    
+    Args:
+        value: 引数の文字列
+    
+    Returns:
+        int: 変換した整数
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
+
 def main():
     """メイン関数"""
     parser = argparse.ArgumentParser(
@@ -273,6 +538,18 @@ def main():
         action='store_true',
         help='ファイル一覧のみ表示（ダウンロードは行わない）'
     )
+    parser.add_argument(
+        '--workers', '-w',
+        type=positive_int,
+        default=DEFAULT_WORKERS,
+        help=f'同時ダウンロード数 (デフォルト: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--chunk-size-mb',
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE_MB,
+        help=f'ダウンロード時のチャンクサイズ（MB、デフォルト: {DEFAULT_CHUNK_SIZE_MB}）'
+    )
     
     args = parser.parse_args()
     
@@ -285,7 +562,7 @@ def main():
     
     try:
         # Google Drive APIサービスを構築
-        service = build('drive', 'v3', credentials=creds)
+        service = build_drive_service(creds)
         print("Google Drive APIに接続しました。")
         
         # フォルダ情報を取得
@@ -313,7 +590,9 @@ def main():
             os.makedirs(args.output, exist_ok=True)
             
             success = download_folder_recursively(
-                service, args.folder_id, folder_name, args.output
+                service, args.folder_id, folder_name, args.output,
+                creds, max_workers=args.workers,
+                chunk_size=args.chunk_size_mb * 1024 * 1024
             )
             
             if success:
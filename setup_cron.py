@@ -71,6 +71,58 @@ def create_cron_entry(folder_path, email, role="writer", interval_minutes=2):
     return cron_entry
 
 
+def read_crontab():
+    """
+    現在のcrontabの内容を行ごとに取得
+    
+    Returns:
+        list: crontabの各行（cronジョブがない場合は空のリスト）
+    """
+    result = subprocess.run(
+        ["crontab", "-l"],
+        capture_output=True,
+        text=True,
+        check=False
+    )
+    
+    if result.returncode != 0:
+        return []
+    return result.stdout.strip().splitlines()
+
+
+def write_crontab(lines):
+    """
+    crontabの内容を置き換え
+    
+    Args:
+        lines: 新しいcrontabの各行（空の場合はcrontabを削除）
+    """
+    if any(line.strip() for line in lines):
+        # 標準入力から渡す
+        subprocess.run(["crontab", "-"], input="\n".join(lines) + "\n", text=True, check=True)
+    else:
+        # すべてのジョブを削除
+        subprocess.run(["crontab", "-r"], check=True)
+
+
+def is_option_in_args(args, option, value):
+    """
+    コマンドライン引数のリストに指定したオプションと値の組があるかチェック
+    
+    Args:
+        args: 空白で区切ったコマンドライン引数のリスト
+        option: オプション名（例: '--folder'）
+        value: オプションの値
+    
+    Returns:
+        bool: 含まれている場合はTrue
+    """
+    return any(
+        arg == option and index + 1 < len(args) and args[index + 1] == value
+        for index, arg in enumerate(args)
+    )
+
+
 def add_cron_job(cron_entry):
     """
     cronジョブを追加
@@ -83,33 +135,20 @@ def add_cron_job(cron_entry):
     """
     try:
         # 現在のcronジョブを取得
-        result = subprocess.run(
-            ["crontab", "-l"],
-            capture_output=True,
-            text=True,
-            check=False
-        )
+        lines = read_crontab()
         
-        current_crons = result.stdout.strip()
-        
-        # 既存のエントリがあるかチェック
-        if cron_entry in current_crons:
+        # 既存のエントリがあるかチェック（コメント行を除いた行単位で比較）
+        existing_entries = {
+            line.strip() for line in lines
+            if line.strip() and not line.strip().startswith('#')
+        }
+        if cron_entry.strip() in existing_entries:
             print("このcronジョブは既に存在します。")
             return True
         
-        # 新しいcronエントリを追加
-        new_crons = current_crons + "\n" + cron_entry if current_crons else cron_entry
-        
-        # 一時ファイルに書き込み
-        temp_file = "/tmp/new_crontab"
-        with open(temp_file, "w") as f:
-            f.write(new_crons + "\n")
-        
-        # crontabを更新
-        subprocess.run(["crontab", temp_file], check=True)
-        
-        # 一時ファイルを削除
-        os.remove(temp_file)
+        # 新しいcronエントリを追加してcrontabを更新
+        lines.append(cron_entry)
+        write_crontab(lines)
         
         print("cronジョブが正常に追加されました。")
         return True
@@ -135,25 +174,20 @@ def remove_cron_job(folder_path, email):
     """
     try:
         # 現在のcronジョブを取得
-        result = subprocess.run(
-            ["crontab", "-l"],
-            capture_output=True,
-            text=True,
-            check=False
-        )
-        
-        current_crons = result.stdout.strip()
-        if not current_crons:
+        lines = read_crontab()
+        if not lines:
             print("cronジョブが存在しません。")
             return True
         
-        # 該当するエントリを除外
-        lines = current_crons.split('\n')
+        # 該当するエントリを除外（引数単位で比較し、前方一致による誤検出を防ぐ）
         filtered_lines = []
         
         for line in lines:
-            if (folder_path in line and email in line and 
-                "share_folder_to_google_drive.py" in line):
+            args = line.split()
+            if (not line.strip().startswith('#') and
+                    "share_folder_to_google_drive.py" in line and
+                    is_option_in_args(args, '--folder', folder_path) and
+                    is_option_in_args(args, '--email', email)):
                 print(f"削除するcronジョブ: {line}")
             else:
                 filtered_lines.append(line)
@@ -163,17 +197,7 @@ def remove_cron_job(folder_path, email):
             return True
         
         # 新しいcrontabを設定
-        new_crons = '\n'.join(filtered_lines)
-        if new_crons.strip():
-            temp_file = "/tmp/new_crontab"
-            with open(temp_file, "w") as f:
-                f.write(new_crons + "\n")
-            
-            subprocess.run(["crontab", temp_file], check=True)
-            os.remove(temp_file)
-        else:
-            # すべてのジョブを削除
-            subprocess.run(["crontab", "-r"], check=True)
+        write_crontab(filtered_lines)
         
         print("cronジョブが正常に削除されました。")
         return True
@@ -189,16 +213,11 @@ def remove_cron_job(folder_path, email):
 def list_cron_jobs():
     """現在のcronジョブを一覧表示"""
     try:
-        result = subprocess.run(
-            ["crontab", "-l"],
-            capture_output=True,
-            text=True,
-            check=False
-        )
+        lines = read_crontab()
         
-        if result.stdout.strip():
+        if lines:
             print("現在のcronジョブ:")
-            print(result.stdout)
+            print("\n".join(lines))
         else:
             print("cronジョブが設定されていません。")
             
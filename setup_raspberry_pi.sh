@@ -92,16 +92,15 @@ setup_cron() {
 setup_systemd() {
     log_info "systemdの設定中..."
     
-    # サービスファイルとタイマーファイルをコピー
+    # サービスファイルをコピー
     sudo cp synctogoogledrive.service /etc/systemd/system/
-    sudo cp synctogoogledrive.timer /etc/systemd/system/
     
     # 設定を再読み込み
     sudo systemctl daemon-reload
     
-    # タイマーを有効化して開始
-    sudo systemctl enable synctogoogledrive.timer
-    sudo systemctl start synctogoogledrive.timer
+    # 常駐サービスを有効化して開始（同期間隔はスクリプトの --interval で指定）
+    sudo systemctl enable synctogoogledrive.service
+    sudo systemctl start synctogoogledrive.service
     
     log_info "systemdの設定が完了しました"
 }
@@ -137,11 +136,11 @@ check_status() {
     crontab -l 2>/dev/null || echo "cronジョブが設定されていません"
     
     echo ""
-    echo "=== systemdタイマーの状態 ==="
-    if systemctl is-enabled synctogoogledrive.timer &>/dev/null; then
-        systemctl status synctogoogledrive.timer --no-pager -l
+    echo "=== systemdサービスの状態 ==="
+    if systemctl is-enabled synctogoogledrive.service &>/dev/null; then
+        systemctl status synctogoogledrive.service --no-pager -l
     else
-        echo "systemdタイマーが設定されていません"
+        echo "systemdサービスが設定されていません"
     fi
     
     echo ""
@@ -201,7 +200,7 @@ main() {
     echo ""
     echo "使用方法:"
     echo "- cronの場合: 設定した間隔で自動実行されます"
-    echo "- systemdの場合: sudo systemctl status synctogoogledrive.timer で状態確認"
+    echo "- systemdの場合: sudo systemctl status synctogoogledrive.service で状態確認"
     echo "- ログの確認: tail -f *.log"
 }
 
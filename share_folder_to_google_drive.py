@@ -8,6 +8,9 @@ Google Driveとフォルダを共有するPythonスクリプト
 使用方法:
     python share_folder_to_google_drive.py --folder /path/to/folder --email user@example.com
 
+    # 常駐して120秒ごとに同期する場合
+    python share_folder_to_google_drive.py --folder /path/to/folder --email user@example.com --interval 120
+
 必要な設定:
     1. Google Cloud Consoleでプロジェクトを作成
     2. Google Drive APIを有効化
@@ -16,13 +19,22 @@ Google Driveとフォルダを共有するPythonスクリプト
 """
 
 import os
+import sys
+import time
+import json
+import hashlib
 import argparse
+import functools
 import mimetypes
-from pathlib import Path
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
 
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -36,6 +48,36 @@ SCOPES = ['https://www.googleapis.com/auth/drive.file']
 CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.json'
 
+# アップロード状態ファイル
+UPLOAD_STATE_FILE = 'upload_state.json'
+
+# HTTPリクエストのタイムアウト（秒）
+HTTP_TIMEOUT = 60
+
+# 一時的なエラー（429/5xx）時の最大リトライ回数（指数バックオフで再試行）
+NUM_RETRIES = 5
+
+# 再試行の対象とするHTTPステータスコード
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# バッチリクエスト1回あたりの最大リクエスト数（多すぎるとHTTP 500になりやすい）
+BATCH_SIZE = 25
+
+# これより大きいファイルはレジューマブルアップロードを使う（小さいファイルは1リクエストで送信）
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+
+# レジューマブルアップロードのチャンクサイズ（ワーカーごとにこのサイズのメモリを使用）
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# ハッシュ計算時の読み込みサイズ
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 同時アップロード数（Drive APIのユーザー単位のレート制限を考慮）
+DEFAULT_WORKERS = 8
+
+# ワーカースレッドごとのAPIサービス
+_thread_local = threading.local()
+
 
 def authenticate_google_drive() -> Optional[Credentials]:
     """
@@ -83,6 +125,117 @@ def authenticate_google_drive() -> Optional[Credentials]:
     return creds
 
 
+def build_drive_service(creds: Credentials):
+    """
+    Google Drive APIサービスを構築します。
+    
+    認証済みのHTTPクライアントを1つだけ作成し、以降のすべての
+    API呼び出しで同じ接続（TLSセッション）を使い回します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    # ライブラリに同梱されたディスカバリードキュメントを使い、起動時の取得通信を省く
+    return build('drive', 'v3', http=http, static_discovery=True)
+
+
+def load_upload_state() -> Dict:
+    """
+    アップロード状態を読み込みます。
+    
+    Returns:
+        Dict: アップロード状態
+    """
+    state = {}
+    if os.path.exists(UPLOAD_STATE_FILE):
+        try:
+            with open(UPLOAD_STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"アップロード状態の読み込みに失敗しました: {e}")
+    
+    state.setdefault('folders', {})
+    state.setdefault('files', {})
+    return state
+
+
+def save_upload_state(state: Dict):
+    """
+    アップロード状態を保存します。
+    
+    Args:
+        state: 保存するアップロード状態
+    """
+    try:
+        with open(UPLOAD_STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"アップロード状態の保存に失敗しました: {e}")
+
+
+def get_file_md5(file_path: str) -> str:
+    """
+    ファイルのMD5ハッシュ値を計算します。
+    
+    Args:
+        file_path: ファイルパス
+    
+    Returns:
+        str: ファイルのMD5ハッシュ値（16進数）
+    """
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def escape_query_value(value: str) -> str:
+    """
+    Google Driveの検索クエリ用に文字列をエスケープします。
+    
+    Args:
+        value: エスケープする文字列
+    
+    Returns:
+        str: エスケープされた文字列
+    """
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def find_file_in_drive(service, name: str, parent_id: str, is_folder: bool = False) -> Optional[Dict]:
+    """
+    Google Driveのフォルダ内から名前が一致するファイルまたはフォルダを探します。
+    
+    Args:
+        service: Google Drive APIサービス
+        name: ファイル名またはフォルダ名
+        parent_id: 検索するフォルダのID
+        is_folder: フォルダを探す場合はTrue
+    
+    Returns:
+        Dict: 見つかったファイルの情報（id, md5Checksum, size）、見つからない場合はNone
+    """
+    query = f"name='{escape_query_value(name)}' and '{parent_id}' in parents and trashed=false"
+    if is_folder:
+        query += " and mimeType='application/vnd.google-apps.folder'"
+    else:
+        query += " and mimeType!='application/vnd.google-apps.folder'"
+    
+    results = service.files().list(
+        q=query,
+        pageSize=1,
+        fields="files(id, md5Checksum, size)"
+    ).execute(num_retries=NUM_RETRIES)
+    
+    files = results.get('files', [])
+    return files[0] if files else None
+
+
 def create_folder_in_drive(service, folder_name: str, parent_id: str = None) -> str:
     """
     Google Driveにフォルダを作成します。
@@ -107,7 +260,7 @@ def create_folder_in_drive(service, folder_name: str, parent_id: str = None) ->
         folder = service.files().create(
             body=folder_metadata,
             fields='id'
-        ).execute()
+        ).execute(num_retries=NUM_RETRIES)
         
         folder_id = folder.get('id')
         print(f"フォルダ '{folder_name}' を作成しました (ID: {folder_id})")
@@ -118,7 +271,41 @@ def create_folder_in_drive(service, folder_name: str, parent_id: str = None) ->
         return None
 
 
-def upload_file_to_drive(service, file_path: str, parent_id: str) -> str:
+@functools.lru_cache(maxsize=1024)
+def guess_mime_type(extension: str) -> str:
+    """
+    拡張子からMIMEタイプを推測します（結果は拡張子ごとにキャッシュ）。
+    
+    Args:
+        extension: 小文字の拡張子（例: '.txt'）
+    
+    Returns:
+        str: MIMEタイプ（不明な場合は'application/octet-stream'）
+    """
+    mime_type, _ = mimetypes.guess_type('file' + extension)
+    return mime_type or 'application/octet-stream'
+
+
+def create_media_upload(file_path: str, mime_type: str) -> MediaFileUpload:
+    """
+    ファイルサイズに応じたアップロード方式のメディアを作成します。
+    
+    レジューマブルアップロードはセッション開始のリクエストが追加で必要になるため、
+    小さいファイルは1回のリクエストで送信します。
+    
+    Args:
+        file_path: アップロードするファイルのパス
+        mime_type: ファイルのMIMEタイプ
+    
+    Returns:
+        MediaFileUpload: アップロード用のメディア
+    """
+    if os.path.getsize(file_path) > RESUMABLE_THRESHOLD:
+        return MediaFileUpload(file_path, mimetype=mime_type, resumable=True, chunksize=UPLOAD_CHUNK_SIZE)
+    return MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
+
+
+def upload_file_to_drive(service, file_path: str, parent_id: str, file_id: str = None) -> str:
     """
     ファイルをGoogle Driveにアップロードします。
     
@@ -126,6 +313,7 @@ def upload_file_to_drive(service, file_path: str, parent_id: str) -> str:
         service: Google Drive APIサービス
         file_path: アップロードするファイルのパス
         parent_id: アップロード先のフォルダID
+        file_id: 更新するGoogle Drive上のファイルID（Noneの場合は新規作成）
     
     Returns:
         str: アップロードされたファイルのID
@@ -133,12 +321,28 @@ def upload_file_to_drive(service, file_path: str, parent_id: str) -> str:
     file_name = os.path.basename(file_path)
     
     # MIMEタイプを推測
-    mime_type, _ = mimetypes.guess_type(file_path)
-    if mime_type is None:
-        mime_type = 'application/octet-stream'
+    mime_type = guess_mime_type(os.path.splitext(file_path)[1].lower())
     
     try:
-        media = MediaFileUpload(file_path, mimetype=mime_type, resumable=True)
+        if file_id:
+            # 既存のファイルの内容を更新
+            try:
+                media = create_media_upload(file_path, mime_type)
+                service.files().update(
+                    fileId=file_id,
+                    media_body=media,
+                    fields='id'
+                ).execute(num_retries=NUM_RETRIES)
+                
+                print(f"ファイル '{file_name}' を更新しました (ID: {file_id})")
+                return file_id
+            
+            except HttpError as error:
+                # Google Drive上で削除されている場合は新規にアップロード
+                if error.resp.status != 404:
+                    raise
+        
+        media = create_media_upload(file_path, mime_type)
         
         file_metadata = {
             'name': file_name,
@@ -149,7 +353,7 @@ def upload_file_to_drive(service, file_path: str, parent_id: str) -> str:
             body=file_metadata,
             media_body=media,
             fields='id'
-        ).execute()
+        ).execute(num_retries=NUM_RETRIES)
         
         file_id = file.get('id')
         print(f"ファイル '{file_name}' をアップロードしました (ID: {file_id})")
@@ -160,73 +364,433 @@ def upload_file_to_drive(service, file_path: str, parent_id: str) -> str:
         return None
 
 
-def upload_folder_recursively(service, local_folder_path: str, drive_parent_id: str) -> bool:
+def get_or_create_folder(service, folder_name: str, parent_id: str) -> str:
+    """
+    Google Drive上の既存のフォルダを取得し、なければ作成します。
+    
+    Args:
+        service: Google Drive APIサービス
+        folder_name: フォルダ名
+        parent_id: 親フォルダのID
+    
+    Returns:
+        str: フォルダのID、失敗時はNone
+    """
+    try:
+        folder = find_file_in_drive(service, folder_name, parent_id, is_folder=True)
+        if folder:
+            return folder['id']
+    except HttpError as error:
+        print(f"フォルダの検索に失敗しました: {error}")
+    
+    return create_folder_in_drive(service, folder_name, parent_id)
+
+
+def upload_file_if_changed(service, file_path: str, parent_id: str, file_id: str = None) -> str:
+    """
+    Google Drive上のファイルと内容が異なる場合だけアップロードします。
+    
+    ローカルファイルのMD5とGoogle Drive上のmd5Checksumが一致する場合は
+    アップロードを省略し、異なる場合は既存のファイルを更新します。
+    
+    Args:
+        service: Google Drive APIサービス
+        file_path: アップロードするファイルのパス
+        parent_id: アップロード先のフォルダID
+        file_id: 前回アップロードしたGoogle Drive上のファイルID（不明な場合はNone）
+    
+    Returns:
+        str: Google Drive上のファイルのID、失敗時はNone
+    """
+    file_name = os.path.basename(file_path)
+    
+    # Google Drive上の既存のファイル
+    existing = None
+    
+    try:
+        if file_id:
+            try:
+                existing = service.files().get(
+                    fileId=file_id,
+                    fields='id, md5Checksum, trashed'
+                ).execute(num_retries=NUM_RETRIES)
+                if existing.get('trashed'):
+                    # ゴミ箱に入っている場合は新しく作成する
+                    existing = None
+                    file_id = None
+            except HttpError as error:
+                if error.resp.status != 404:
+                    raise
+                # 削除されている場合は新しく作成する
+                file_id = None
+        else:
+            existing = find_file_in_drive(service, file_name, parent_id)
+        
+        # 内容が同じであればアップロードしない
+        if existing and existing.get('md5Checksum') == get_file_md5(file_path):
+            print(f"ファイル '{file_name}' は変更されていません (ID: {existing['id']})")
+            return existing['id']
+    
+    except (HttpError, OSError) as error:
+        print(f"ファイル '{file_name}' の確認に失敗しました: {error}")
+    
+    # 既存のファイルを更新する（確認に失敗した場合も、記録済みのIDのファイルを更新して重複を作らない）
+    return upload_file_to_drive(service, file_path, parent_id, existing['id'] if existing else file_id)
+
+
+def get_thread_service(creds: Credentials):
+    """
+    現在のスレッド用のGoogle Drive APIサービスを取得します。
+    
+    httplib2はスレッドセーフではないため、ワーカースレッドごとに
+    サービスを1つ構築して使い回します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    service = getattr(_thread_local, 'service', None)
+    if service is None:
+        service = build_drive_service(creds)
+        _thread_local.service = service
+    return service
+
+
+def upload_file_in_thread(creds: Credentials, file_path: str, parent_id: str, file_id: str = None) -> str:
+    """
+    ワーカースレッド上でファイルをアップロードします。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+        file_path: アップロードするファイルのパス
+        parent_id: アップロード先のフォルダID
+        file_id: 更新するGoogle Drive上のファイルID（Noneの場合は新規作成）
+    
+    Returns:
+        str: アップロードされたファイルのID
+    """
+    return upload_file_if_changed(get_thread_service(creds), file_path, parent_id, file_id)
+
+
+def forget_missing_folders(service, state: Dict):
+    """
+    アップロード状態に記録したフォルダのうち、Google Drive上で削除された、
+    またはゴミ箱に入っているものを記録から除きます。
+    
+    存在の確認はバッチリクエストでまとめて行います。除いたフォルダは
+    create_folder_treeで改めて検索・作成されます。
+    
+    Args:
+        service: Google Drive APIサービス
+        state: アップロード状態
+    """
+    folder_keys = list(state['folders'].keys())
+    missing = []
+    
+    for start in range(0, len(folder_keys), BATCH_SIZE):
+        def callback(request_id, response, exception):
+            if exception is not None:
+                # 削除済みの場合のみ除き、一時的なエラーなどでは記録を残す（重複作成を避ける）
+                if isinstance(exception, HttpError) and exception.resp.status == 404:
+                    missing.append(folder_keys[int(request_id)])
+                return
+            if response.get('trashed'):
+                missing.append(folder_keys[int(request_id)])
+        
+        batch = service.new_batch_http_request(callback=callback)
+        for index in range(start, min(start + BATCH_SIZE, len(folder_keys))):
+            batch.add(
+                service.files().get(
+                    fileId=state['folders'][folder_keys[index]]['id'],
+                    fields='id, trashed'
+                ),
+                request_id=str(index)
+            )
+        batch.execute()
+    
+    for folder_key in missing:
+        print(f"Google Drive上のフォルダが見つからないため作成し直します: {folder_key}")
+        del state['folders'][folder_key]
+
+
+def create_folder_tree(service, local_folder_path: str, drive_parent_id: str,
+                       jobs: List[Dict], state: Dict) -> Optional[str]:
+    """
+    ローカルフォルダの階層をGoogle Driveに作成し、アップロードが必要なファイルを収集します。
+    
+    子フォルダの作成には親フォルダのIDが必要なため、フォルダは順番に作成します。
+    前回の実行で作成済みのフォルダは再利用し、前回から変更のない
+    （サイズと更新日時が同じ）ファイルはアップロード対象に含めません。
+    
+    Args:
+        service: Google Drive APIサービス
+        local_folder_path: ローカルフォルダのパス
+        drive_parent_id: 作成先のGoogle DriveフォルダID
+        jobs: アップロード対象のファイル情報を追加するリスト
+        state: アップロード状態
+    
+    Returns:
+        str: フォルダのID、失敗時はNone
+    """
+    folder_key = os.path.abspath(local_folder_path)
+    folder_name = os.path.basename(folder_key)
+    
+    # 作成済みのフォルダは再利用し、なければGoogle Driveにフォルダを作成
+    folder_state = state['folders'].get(folder_key)
+    if folder_state and folder_state['parent'] == drive_parent_id:
+        drive_folder_id = folder_state['id']
+    else:
+        drive_folder_id = get_or_create_folder(service, folder_name, drive_parent_id)
+        if not drive_folder_id:
+            return None
+        state['folders'][folder_key] = {'id': drive_folder_id, 'parent': drive_parent_id}
+    
+    # フォルダ内のファイルとサブフォルダを処理
+    # （os.scandirはディレクトリ読み込み時に得た種別を使うため、種別判定にstatが不要）
+    with os.scandir(folder_key) as entries:
+        for entry in entries:
+            if entry.is_file():
+                entry_stat = entry.stat()
+                file_state = state['files'].get(entry.path)
+                
+                if file_state and file_state['parent'] == drive_folder_id:
+                    # 前回のアップロードから変更がなければスキップ
+                    if (file_state['size'] == entry_stat.st_size and
+                            file_state['mtime_ns'] == entry_stat.st_mtime_ns):
+                        continue
+                    file_id = file_state['id']
+                else:
+                    file_id = None
+                
+                jobs.append({
+                    'path': entry.path,
+                    'parent': drive_folder_id,
+                    'id': file_id,
+                    'size': entry_stat.st_size,
+                    'mtime_ns': entry_stat.st_mtime_ns
+                })
+            elif entry.is_dir():
+                create_folder_tree(service, entry.path, drive_folder_id, jobs, state)
+    
+    return drive_folder_id
+
+
+def upload_folder_recursively(service, local_folder_path: str, drive_parent_id: str,
+                              creds: Credentials, executor: ThreadPoolExecutor) -> Optional[str]:
     """
     フォルダを再帰的にGoogle Driveにアップロードします。
     
+    フォルダ階層を作成した後、前回から変更のあったファイルだけを
+    複数のワーカースレッドで並列にアップロードします。
+    
     Args:
         service: Google Drive APIサービス
         local_folder_path: アップロードするローカルフォルダのパス
         drive_parent_id: アップロード先のGoogle DriveフォルダID
+        creds: 認証済みのクレデンシャル（ワーカースレッドのサービス構築用）
+        executor: アップロード用のスレッドプール（ワーカー数が同時アップロード数）
     
     Returns:
-        bool: 成功時はTrue、失敗時はFalse
+        str: アップロード先に作成したフォルダのID、失敗時はNone
     """
+    state = load_upload_state()
+    
     try:
-        local_path = Path(local_folder_path)
-        folder_name = local_path.name
+        # 記録済みのフォルダが削除・ゴミ箱に移動されていないか確認
+        forget_missing_folders(service, state)
         
-        # Google Driveにフォルダを作成
-        drive_folder_id = create_folder_in_drive(service, folder_name, drive_parent_id)
+        jobs = []
+        drive_folder_id = create_folder_tree(service, local_folder_path, drive_parent_id, jobs, state)
         if not drive_folder_id:
-            return False
+            return None
         
-        # フォルダ内のファイルとサブフォルダを処理
-        for item in local_path.iterdir():
-            if item.is_file():
-                upload_file_to_drive(service, str(item), drive_folder_id)
-            elif item.is_dir():
-                upload_folder_recursively(service, str(item), drive_folder_id)
+        success_count = 0
+        futures = {
+            executor.submit(upload_file_in_thread, creds, job['path'], job['parent'], job['id']): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                file_id = future.result()
+            except Exception as e:
+                # 走査後に削除されたファイルなど、1つの失敗で全体を中断しない
+                print(f"ファイル '{job['path']}' のアップロードに失敗しました: {e}")
+                continue
+            
+            if file_id:
+                state['files'][job['path']] = {
+                    'id': file_id,
+                    'parent': job['parent'],
+                    'size': job['size'],
+                    'mtime_ns': job['mtime_ns']
+                }
+                success_count += 1
         
-        return True
+        if jobs:
+            print(f"ファイルのアップロード完了: {success_count}/{len(jobs)} 成功")
+        else:
+            print("変更されたファイルはありません")
+        return drive_folder_id
     
     except Exception as e:
         print(f"フォルダ '{local_folder_path}' のアップロードに失敗しました: {e}")
-        return False
+        return None
+    
+    finally:
+        # 途中で失敗しても、それまでに記録したフォルダとファイルのIDは保存する
+        save_upload_state(state)
 
 
-def share_folder_with_user(service, folder_id: str, user_email: str, role: str = 'writer') -> bool:
+def share_folder_with_users(service, folder_id: str, user_emails: List[str], role: str = 'writer',
+                            finished: List[str] = None) -> bool:
     """
-    フォルダを特定のユーザーと共有します。
+    フォルダを複数のユーザーと共有します。
+    
+    権限の作成はバッチリクエストでまとめて送信します。
     
     Args:
         service: Google Drive APIサービス
         folder_id: 共有するフォルダのID
-        user_email: 共有先のユーザーのメールアドレス
+        user_emails: 共有先のユーザーのメールアドレスのリスト
         role: 共有権限（'reader', 'writer', 'commenter', 'owner'）
+        finished: 共有が成功したか、再試行しても成功しない（無効なアドレスなど）
+                  メールアドレスを追加するリスト（省略可）
     
     Returns:
-        bool: 成功時はTrue、失敗時はFalse
+        bool: すべて成功した場合はTrue、失敗があった場合はFalse
     """
-    try:
+    failed = []
+    retry_indices = []
+    if finished is None:
+        finished = []
+    
+    def create_permission(user_email: str):
         permission = {
             'type': 'user',
             'role': role,
             'emailAddress': user_email
         }
-        
-        service.permissions().create(
+        return service.permissions().create(
             fileId=folder_id,
             body=permission,
             fields='id'
-        ).execute()
-        
-        print(f"フォルダを '{user_email}' と共有しました (権限: {role})")
-        return True
+        )
+    
+    def callback(request_id, response, exception):
+        user_email = user_emails[int(request_id)]
+        if exception is None:
+            print(f"フォルダを '{user_email}' と共有しました (権限: {role})")
+            finished.append(user_email)
+        elif isinstance(exception, HttpError) and exception.resp.status in RETRYABLE_STATUS_CODES:
+            # 一時的なエラーは後で個別に再試行
+            retry_indices.append(int(request_id))
+        else:
+            print(f"フォルダの共有に失敗しました ({user_email}): {exception}")
+            failed.append(user_email)
+            finished.append(user_email)
+    
+    try:
+        for start in range(0, len(user_emails), BATCH_SIZE):
+            batch = service.new_batch_http_request(callback=callback)
+            for index in range(start, min(start + BATCH_SIZE, len(user_emails))):
+                batch.add(create_permission(user_emails[index]), request_id=str(index))
+            batch.execute()
     
     except HttpError as error:
         print(f"フォルダの共有に失敗しました: {error}")
         return False
+    
+    # 一時的なエラーになった共有はリトライ付きで個別に実行
+    for index in retry_indices:
+        user_email = user_emails[index]
+        try:
+            create_permission(user_email).execute(num_retries=NUM_RETRIES)
+            print(f"フォルダを '{user_email}' と共有しました (権限: {role})")
+            finished.append(user_email)
+        except HttpError as error:
+            print(f"フォルダの共有に失敗しました ({user_email}): {error}")
+            failed.append(user_email)
+            if error.resp.status not in RETRYABLE_STATUS_CODES:
+                finished.append(user_email)
+    
+    return not failed
+
+
+def share_folder_with_user(service, folder_id: str, user_email: str, role: str = 'writer') -> bool:
+    """
+    フォルダを特定のユーザーと共有します。
+    
+    Args:
+        service: Google Drive APIサービス
+        folder_id: 共有するフォルダのID
+        user_email: 共有先のユーザーのメールアドレス
+        role: 共有権限（'reader', 'writer', 'commenter', 'owner'）
+    
+    Returns:
+        bool: 成功時はTrue、失敗時はFalse
+    """
+    return share_folder_with_users(service, folder_id, [user_email], role)
+
+
+def upload_and_share(service, creds: Credentials, args, user_emails: List[str],
+                     executor: ThreadPoolExecutor) -> List[str]:
+    """
+    フォルダをアップロードし、指定したユーザーと共有します。
+    
+    Args:
+        service: Google Drive APIサービス
+        creds: 認証済みのクレデンシャル
+        args: コマンドライン引数
+        user_emails: 共有先のユーザーのメールアドレスのリスト（空の場合は共有しない）
+        executor: アップロード用のスレッドプール
+    
+    Returns:
+        List[str]: 一時的なエラーなどで共有できず、再試行が必要なメールアドレスのリスト
+    """
+    # フォルダをアップロード
+    print(f"フォルダ '{args.folder}' をアップロード中...")
+    folder_id = upload_folder_recursively(
+        service, args.folder, args.parent_folder or 'root',
+        creds, executor
+    )
+    
+    if not folder_id:
+        print("フォルダのアップロードに失敗しました。")
+        return user_emails
+    
+    if not user_emails:
+        return []
+    
+    print(f"アップロード完了: フォルダID = {folder_id}")
+    
+    # ユーザーと共有
+    print(f"ユーザー '{', '.join(user_emails)}' と共有中...")
+    finished = []
+    share_folder_with_users(service, folder_id, user_emails, args.role, finished)
+    
+    # 共有リンクを生成
+    share_link = f"https://drive.google.com/drive/folders/{folder_id}"
+    print(f"共有リンク: {share_link}")
+    return [user_email for user_email in user_emails if user_email not in finished]
+
+
+def positive_int(value: str) -> int:
+    """
+    コマンドライン引数を1以上の整数に変換します。
+    
+    Args:
+        value: 引数の文字列
+    
+    Returns:
+        int: 変換した整数
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
 
 
 def main():
@@ -242,7 +806,8 @@ def main():
     parser.add_argument(
         '--email', '-e',
         required=True,
-        help='共有先のユーザーのメールアドレス'
+        nargs='+',
+        help='共有先のユーザーのメールアドレス（複数指定可）'
     )
     parser.add_argument(
         '--role', '-r',
@@ -254,6 +819,18 @@ def main():
         '--parent-folder', '-p',
         help='Google Drive上の親フォルダID（指定しない場合はルート）'
     )
+    parser.add_argument(
+        '--workers', '-w',
+        type=positive_int,
+        default=DEFAULT_WORKERS,
+        help=f'同時アップロード数 (デフォルト: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--interval', '-i',
+        type=int,
+        default=0,
+        help='常駐して同期を繰り返す間隔（秒、デフォルト: 0 = 一度だけ実行）'
+    )
     
     args = parser.parse_args()
     
@@ -266,52 +843,60 @@ def main():
         print(f"エラー: '{args.folder}' はフォルダではありません。")
         return
     
+    # MIMEタイプのデータベースを先に読み込む（アップロード中の遅延初期化を避ける）
+    mimetypes.init()
+    
     # Google Drive APIの認証
     print("Google Drive APIの認証中...")
     creds = authenticate_google_drive()
     if not creds:
         print("認証に失敗しました。")
-        return
+        sys.exit(1)
     
     try:
         # Google Drive APIサービスを構築
-        service = build('drive', 'v3', credentials=creds)
+        service = build_drive_service(creds)
         print("Google Drive APIに接続しました。")
         
-        # フォルダをアップロード
-        print(f"フォルダ '{args.folder}' をアップロード中...")
-        success = upload_folder_recursively(service, args.folder, args.parent_folder or 'root')
-        
-        if success:
-            # アップロードされたフォルダのIDを取得
-            folder_name = os.path.basename(args.folder)
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder'"
-            if args.parent_folder:
-                query += f" and '{args.parent_folder}' in parents"
+        # スレッドプールは監視中ずっと使い回し、ワーカースレッドごとのAPIサービス
+        # （とその接続）を同期のたびに作り直さないようにする
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            if args.interval <= 0:
+                upload_and_share(service, creds, args, args.email, executor)
+                return
             
-            results = service.files().list(q=query, fields="files(id, name)").execute()
-            files = results.get('files', [])
+            # 常駐して定期的に同期（認証・接続は使い回す）
+            print(f"フォルダの監視を開始します（間隔: {args.interval}秒）")
+            print("Ctrl+Cで停止")
             
-            if files:
-                folder_id = files[0]['id']
-                print(f"アップロード完了: フォルダID = {folder_id}")
-                
-                # ユーザーと共有
-                print(f"ユーザー '{args.email}' と共有中...")
-                share_folder_with_user(service, folder_id, args.email, args.role)
-                
-                # 共有リンクを生成
-                share_link = f"https://drive.google.com/drive/folders/{folder_id}"
-                print(f"共有リンク: {share_link}")
-            else:
-                print("アップロードされたフォルダのIDを取得できませんでした。")
-        else:
-            print("フォルダのアップロードに失敗しました。")
+            # 共有設定がまだ済んでいないメールアドレス
+            pending_emails = list(args.email)
+            try:
+                while True:
+                    print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 同期中...")
+                    
+                    try:
+                        # 共有設定は、一時的なエラーで共有できなかったアドレスだけ次回も行う
+                        pending_emails = upload_and_share(service, creds, args, pending_emails,
+                                                         executor)
+                    except HttpError as error:
+                        print(f"Google Drive APIエラー: {error}")
+                    except Exception as e:
+                        # ネットワーク障害などで1回の同期が失敗しても監視は続ける
+                        print(f"同期中にエラーが発生しました: {e}")
+                    
+                    time.sleep(args.interval)
+            
+            except KeyboardInterrupt:
+                print("\n監視を停止しました")
     
+    # 異常終了として終了コードを返し、systemdなどが再起動できるようにする
     except HttpError as error:
         print(f"Google Drive APIエラー: {error}")
+        sys.exit(1)
     except Exception as e:
         print(f"予期しないエラー: {e}")
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -8,18 +8,25 @@ Google Drive共有フォルダの自動同期スクリプト
 
 import os
 import time
+import calendar
+import functools
 import hashlib
 import argparse
 import json
-from pathlib import Path
-from typing import Optional, Dict, List
-from datetime import datetime, timedelta
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Optional, Dict, Iterator, List, Tuple
+from datetime import datetime
 
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseDownload
 
 
 # Google Drive APIのスコープ
@@ -29,9 +36,45 @@ SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 CREDENTIALS_FILE = 'credentials.json'
 TOKEN_FILE = 'token.json'
 
+# HTTPリクエストのタイムアウト（秒）
+HTTP_TIMEOUT = 60
+
+# 一時的なエラー（429/5xx）時の最大リトライ回数（指数バックオフで再試行）
+NUM_RETRIES = 5
+
+# 再試行の対象とするHTTPステータスコード
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# バッチリクエスト1回あたりの最大リクエスト数（多すぎるとHTTP 500になりやすい）
+BATCH_SIZE = 25
+
+# フォルダ内容の取得時に要求するフィールド
+FOLDER_CONTENTS_FIELDS = "nextPageToken, files(id, name, mimeType, size, modifiedTime, md5Checksum)"
+
 # 同期状態ファイル
 SYNC_STATE_FILE = 'sync_state.json'
 
+# ハッシュ計算時の読み込みサイズ
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Google Workspaceファイル（ドキュメント、スプレッドシート等）のエクスポート形式
+EXPORT_MIME_TYPE = 'application/pdf'
+
+# ダウンロード時に1回のリクエストで取得するバイト数
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 同時ダウンロード数（Drive APIのユーザー単位のレート制限を考慮）
+DEFAULT_WORKERS = 8
+
+# 同時に実行するフォルダ一覧取得（バッチリクエスト）の数
+LIST_WORKERS = 8
+
+# ワーカースレッドごとのAPIサービス
+_thread_local = threading.local()
+
+# 作成済み（存在を確認済み）のローカルフォルダ
+_known_dirs = set()
+
 
 def authenticate_google_drive() -> Optional[Credentials]:
     """
@@ -79,6 +122,24 @@ def authenticate_google_drive() -> Optional[Credentials]:
     return creds
 
 
+def build_drive_service(creds: Credentials):
+    """
+    Google Drive APIサービスを構築します。
+    
+    認証済みのHTTPクライアントを1つだけ作成し、以降のすべての
+    API呼び出しで同じ接続（TLSセッション）を使い回します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    # ライブラリに同梱されたディスカバリードキュメントを使い、起動時の取得通信を省く
+    return build('drive', 'v3', http=http, static_discovery=True)
+
+
 def load_sync_state() -> Dict:
     """
     同期状態を読み込みます。
@@ -104,8 +165,11 @@ def save_sync_state(state: Dict):
         state: 保存する同期状態
     """
     try:
-        with open(SYNC_STATE_FILE, 'w', encoding='utf-8') as f:
+        # 一時ファイルに書き込んでから置き換え、書き込み途中で中断されても壊れないようにする
+        tmp_file = SYNC_STATE_FILE + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, SYNC_STATE_FILE)
     except Exception as e:
         print(f"同期状態の保存に失敗しました: {e}")
 
@@ -121,39 +185,479 @@ def get_file_hash(file_path: str) -> str:
         str: ファイルのハッシュ値
     """
     try:
-        with open(file_path, 'rb') as f:
-            return hashlib.md5(f.read()).hexdigest()
+        md5 = hashlib.md5()
+        
+        # ファイル全体を読み込まず、同じバッファを使い回して少しずつ計算
+        buffer = bytearray(HASH_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with open(file_path, 'rb', buffering=0) as f:
+            # 先頭から順に読むことをカーネルに伝え、先読みを大きくする（Linuxなど対応OSのみ）
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                md5.update(view[:size])
+        
+        return md5.hexdigest()
     except Exception:
         return ""
 
 
-def get_folder_contents(service, folder_id: str) -> List[Dict]:
+def remember_file_hash(sync_state: Dict, file_path: str, file_hash: str, file_stat: os.stat_result = None):
+    """
+    ファイルのハッシュ値を、サイズと更新日時とともに同期状態に記録します。
+    
+    Args:
+        sync_state: 同期状態
+        file_path: ファイルパス
+        file_hash: ファイルのハッシュ値
+        file_stat: ファイルのstat結果（省略時は取得）
+    """
+    if file_stat is None:
+        file_stat = os.stat(file_path)
+    
+    sync_state.setdefault('local_hashes', {})[file_path] = {
+        'size': file_stat.st_size,
+        'mtime_ns': file_stat.st_mtime_ns,
+        'hash': file_hash
+    }
+
+
+def get_cached_file_hash(sync_state: Dict, file_path: str, file_stat: os.stat_result = None) -> str:
+    """
+    ファイルのハッシュ値を取得します。
+    
+    サイズと更新日時（ナノ秒）が前回と同じ場合は、同期状態に記録された
+    ハッシュ値を再利用し、ファイルを読み込みません。
+    
+    Args:
+        sync_state: 同期状態
+        file_path: ファイルパス
+        file_stat: ファイルのstat結果（省略時は取得）
+    
+    Returns:
+        str: ファイルのハッシュ値
+    """
+    if file_stat is None:
+        file_stat = os.stat(file_path)
+    
+    cached = sync_state.get('local_hashes', {}).get(file_path)
+    if (cached and cached['size'] == file_stat.st_size and
+            cached['mtime_ns'] == file_stat.st_mtime_ns):
+        return cached['hash']
+    
+    file_hash = get_file_hash(file_path)
+    if file_hash:
+        remember_file_hash(sync_state, file_path, file_hash, file_stat)
+    return file_hash
+
+
+def get_folder_contents(service, folder_id: str, page_token: str = None) -> Optional[List[Dict]]:
     """
     フォルダ内のファイルとサブフォルダを取得します。
     
     Args:
         service: Google Drive APIサービス
         folder_id: フォルダID
+        page_token: 取得を開始するページのトークン
     
     Returns:
-        List[Dict]: ファイルとフォルダのリスト
+        Optional[List[Dict]]: ファイルとフォルダのリスト、取得に失敗した場合はNone
     """
     try:
-        results = service.files().list(
-            q=f"'{folder_id}' in parents and trashed=false",
-            pageSize=1000,
-            fields="files(id, name, mimeType, size, modifiedTime, md5Checksum)",
-            orderBy="modifiedTime desc"
-        ).execute()
+        items = []
         
-        return results.get('files', [])
+        # 次のページがなくなるまで取得
+        while True:
+            results = service.files().list(
+                q=f"'{folder_id}' in parents and trashed=false",
+                pageSize=1000,
+                fields=FOLDER_CONTENTS_FIELDS,
+                orderBy="modifiedTime desc",
+                pageToken=page_token
+            ).execute(num_retries=NUM_RETRIES)
+            
+            items.extend(results.get('files', []))
+            
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        
+        return items
     
     except HttpError as error:
         print(f"フォルダ内容の取得に失敗しました: {error}")
-        return []
+        return None
+
+
+def get_folders_contents(service, folder_ids: List[str]) -> Dict[str, List[Dict]]:
+    """
+    複数フォルダの内容をバッチリクエストでまとめて取得します。
+    
+    Args:
+        service: Google Drive APIサービス
+        folder_ids: フォルダIDのリスト
+    
+    Returns:
+        Dict[str, List[Dict]]: フォルダIDごとのファイルとフォルダのリスト
+                               （取得に失敗したフォルダは含まない）
+    """
+    contents = {}
+    
+    for start in range(0, len(folder_ids), BATCH_SIZE):
+        page_tokens = {}
+        retry_ids = []
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                if isinstance(exception, HttpError) and exception.resp.status in RETRYABLE_STATUS_CODES:
+                    # 一時的なエラーは後で個別に再取得
+                    retry_ids.append(request_id)
+                else:
+                    print(f"フォルダ内容の取得に失敗しました: {exception}")
+                return
+            
+            contents[request_id] = response.get('files', [])
+            if response.get('nextPageToken'):
+                page_tokens[request_id] = response['nextPageToken']
+        
+        batch = service.new_batch_http_request(callback=callback)
+        for folder_id in folder_ids[start:start + BATCH_SIZE]:
+            batch.add(
+                service.files().list(
+                    q=f"'{folder_id}' in parents and trashed=false",
+                    pageSize=1000,
+                    fields=FOLDER_CONTENTS_FIELDS,
+                    orderBy="modifiedTime desc"
+                ),
+                request_id=folder_id
+            )
+        batch.execute()
+        
+        # 一時的なエラーになったフォルダはリトライ付きで個別に取得
+        for folder_id in retry_ids:
+            items = get_folder_contents(service, folder_id)
+            if items is not None:
+                contents[folder_id] = items
+        
+        # 2ページ目以降はフォルダごとに取得（途中で失敗したフォルダは取得失敗とする）
+        for folder_id, page_token in page_tokens.items():
+            items = get_folder_contents(service, folder_id, page_token)
+            if items is None:
+                del contents[folder_id]
+            else:
+                contents[folder_id].extend(items)
+    
+    return contents
+
+
+def get_thread_service(creds: Credentials):
+    """
+    現在のスレッド用のGoogle Drive APIサービスを取得します。
+    
+    httplib2はスレッドセーフではないため、ワーカースレッドごとに
+    サービスを1つ構築して使い回します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+    
+    Returns:
+        Google Drive APIサービス
+    """
+    service = getattr(_thread_local, 'service', None)
+    if service is None:
+        service = build_drive_service(creds)
+        _thread_local.service = service
+    return service
+
+
+def get_folders_contents_in_thread(creds: Credentials, folder_ids: List[str]) -> Dict[str, List[Dict]]:
+    """
+    ワーカースレッド上で複数フォルダの内容をまとめて取得します。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+        folder_ids: フォルダIDのリスト
+    
+    Returns:
+        Dict[str, List[Dict]]: フォルダIDごとのファイルとフォルダのリスト
+    """
+    return get_folders_contents(get_thread_service(creds), folder_ids)
+
+
+def get_subtree_contents(service, root_id: str, creds: Credentials,
+                         executor: ThreadPoolExecutor) -> Tuple[Dict[str, List[Dict]], bool]:
+    """
+    フォルダ以下のすべての階層の内容を取得します。
+    
+    見つかったサブフォルダはバッチリクエストにまとめ、複数のスレッドで
+    並行して一覧取得します。階層の深さを待たずに、一覧取得が終わった
+    フォルダから順に次のサブフォルダの取得を開始します。
+    
+    Args:
+        service: Google Drive APIサービス（起点のフォルダの一覧取得用）
+        root_id: 起点のフォルダID
+        creds: 認証済みのクレデンシャル（ワーカースレッドのサービス構築用）
+        executor: 一覧取得用のスレッドプール（ワーカースレッドのサービスを使い回すため、
+                  呼び出し側で作成して使い続ける）
+    
+    Returns:
+        Tuple[Dict[str, List[Dict]], bool]: (フォルダIDごとのファイルとフォルダのリスト,
+                                             すべてのフォルダの一覧取得に成功した場合はTrue)
+    """
+    subtree = {}
+    # 一覧取得を開始したフォルダID
+    requested = {root_id}
+    
+    futures = set()
+    contents = get_folders_contents(service, [root_id])
+    
+    while True:
+        subtree.update(contents)
+        
+        # 新しく見つかったサブフォルダ（複数の親を持つフォルダは一度だけ取得）
+        subfolder_ids = []
+        for items in contents.values():
+            for item in items:
+                if item['mimeType'] == 'application/vnd.google-apps.folder' and item['id'] not in requested:
+                    requested.add(item['id'])
+                    subfolder_ids.append(item['id'])
+        
+        # 見つかったサブフォルダの一覧取得をすぐに開始
+        for start in range(0, len(subfolder_ids), BATCH_SIZE):
+            futures.add(executor.submit(
+                get_folders_contents_in_thread, creds, subfolder_ids[start:start + BATCH_SIZE]
+            ))
+        
+        if not futures:
+            break
+        
+        # いずれかの一覧取得が終わるまで待つ
+        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+        contents = {}
+        for future in done:
+            contents.update(future.result())
+    
+    # 一覧取得に失敗したフォルダがある場合、内容は空として扱われるため不完全
+    complete = len(subtree) == len(requested)
+    if not complete:
+        print(f"{len(requested) - len(subtree)}個のフォルダの内容を取得できませんでした")
+    
+    return subtree, complete
+
+
+def get_start_page_token(service) -> str:
+    """
+    Changes APIの現在のページトークンを取得します。
+    
+    Args:
+        service: Google Drive APIサービス
+    
+    Returns:
+        str: 以降の変更を取得するためのページトークン
+    """
+    response = service.changes().getStartPageToken().execute(num_retries=NUM_RETRIES)
+    return response.get('startPageToken')
+
+
+def get_changes_root(folder_id: str, local_path: str) -> Dict:
+    """
+    Changes APIのページトークンがどの同期対象のものかを表す情報を作成します。
+    
+    Args:
+        folder_id: 同期するGoogle DriveフォルダのID
+        local_path: 同期先のローカルパス
+    
+    Returns:
+        Dict: フォルダIDとローカルパス（絶対パス）
+    """
+    return {'folder_id': folder_id, 'local_path': os.path.abspath(local_path)}
+
+
+def store_changes_token(sync_state: Dict, changes_token: str, folder_id: str, local_path: str,
+                        subtree: Dict[str, List[Dict]]):
+    """
+    以降はChanges APIで差分だけを確認できるよう、ページトークンを同期状態に記録します。
+    
+    Args:
+        sync_state: 同期状態
+        changes_token: 一覧取得より前に取得したページトークン
+        folder_id: 同期するGoogle DriveフォルダのID
+        local_path: 同期先のローカルパス
+        subtree: get_subtree_contentsで取得したフォルダ内容
+    """
+    sync_state['changes_token'] = changes_token
+    sync_state['changes_root'] = get_changes_root(folder_id, local_path)
+    sync_state['folder_ids'] = list(subtree.keys())
+
+
+def is_in_local_path(path: str, local_path: str) -> bool:
+    """
+    パスが同期先のローカルパス以下にあるかチェックします。
+    
+    Args:
+        path: チェックするパス
+        local_path: 同期先のローカルパス
+    
+    Returns:
+        bool: 同期先のローカルパス以下にある場合はTrue
+    """
+    return os.path.abspath(path).startswith(os.path.join(os.path.abspath(local_path), ''))
+
+
+def check_for_remote_changes(service, sync_state: Dict, folder_id: str, local_path: str) -> Optional[bool]:
+    """
+    前回の同期以降にGoogle Drive上で変更があったかをChanges APIで確認します。
+    
+    変更がなかった場合は、同期状態のページトークンを最新のものに進めます。
+    
+    Args:
+        service: Google Drive APIサービス
+        sync_state: 同期状態
+        folder_id: 同期するGoogle DriveフォルダのID
+        local_path: 同期先のローカルパス
+    
+    Returns:
+        Optional[bool]: 変更がある場合はTrue、ない場合はFalse、
+                        ページトークンが未取得などで判定できない場合はNone
+    """
+    page_token = sync_state.get('changes_token')
+    folder_ids = set(sync_state.get('folder_ids', []))
+    if not page_token or not folder_ids:
+        return None
+    
+    # 別のフォルダや同期先で記録したページトークンは使わない
+    if sync_state.get('changes_root') != get_changes_root(folder_id, local_path):
+        return None
+    
+    try:
+        changed = False
+        new_start_token = None
+        
+        while page_token:
+            response = service.changes().list(
+                pageToken=page_token,
+                spaces='drive',
+                pageSize=1000,
+                fields="nextPageToken, newStartPageToken, changes(fileId, file(parents))"
+            ).execute(num_retries=NUM_RETRIES)
+            
+            for change in response.get('changes', []):
+                file_id = change.get('fileId')
+                parents = change.get('file', {}).get('parents', [])
+                
+                # 同期対象のフォルダ内のファイル、または同期済みのファイルの変更
+                if (file_id in folder_ids or file_id in sync_state or
+                        any(parent in folder_ids for parent in parents)):
+                    changed = True
+            
+            new_start_token = response.get('newStartPageToken', new_start_token)
+            page_token = response.get('nextPageToken')
+        
+        # ページトークンが進んだ場合のみ保存（変更のないポーリングでは書き込まない）
+        if not changed and new_start_token and new_start_token != sync_state['changes_token']:
+            sync_state['changes_token'] = new_start_token
+            save_sync_state(sync_state)
+        
+        return changed
+    
+    except HttpError as error:
+        print(f"変更履歴の取得に失敗しました: {error}")
+        return None
+
+
+def is_synced_file_changed_locally(sync_state: Dict, local_path: str) -> bool:
+    """
+    同期済みのファイルがローカルで削除・変更されていないかチェックします。
+    
+    ハッシュ値を記録したときのサイズと更新日時（ナノ秒）と比較するため、
+    ファイルごとのstat 1回で判定でき、ファイルは読み込みません。
+    
+    Args:
+        sync_state: 同期状態
+        local_path: 同期先のローカルパス（これ以下のファイルだけをチェック）
+    
+    Returns:
+        bool: 削除・変更されたファイルがある場合はTrue
+    """
+    local_hashes = sync_state.get('local_hashes', {})
+    
+    for entry in sync_state.values():
+        if not (isinstance(entry, dict) and 'local_path' in entry):
+            continue
+        if not is_in_local_path(entry['local_path'], local_path):
+            continue
+        
+        try:
+            local_stat = os.stat(entry['local_path'])
+        except FileNotFoundError:
+            print(f"ローカルから削除されたファイルを検出: {entry['name']}")
+            return True
+        
+        # ハッシュ値を記録していないファイル（Google Workspaceファイルなど）は存在のみ確認
+        cached = local_hashes.get(entry['local_path'])
+        if cached and (cached['size'] != local_stat.st_size or
+                       cached['mtime_ns'] != local_stat.st_mtime_ns):
+            print(f"ローカルで変更されたファイルを検出: {entry['name']}")
+            return True
+    
+    return False
+
+
+def iter_tree(root: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    フォルダ以下のすべてのファイルを走査します。
+    
+    os.scandirがディレクトリ読み込み時に得た種別とstat結果を使うため、
+    ファイルごとに余分なstatを行いません。
+    
+    Args:
+        root: 起点のフォルダパス
+    
+    Yields:
+        Tuple[str, os.stat_result]: (ファイルパス, stat結果)
+    """
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                # シンボリックリンクはたどらない
+                if entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.stat(follow_symlinks=False)
+                elif entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
 
 
-def check_for_changes(service, folder_id: str, local_path: str, sync_state: Dict) -> bool:
+def iter_subtree_items(folder_id: str, local_path: str,
+                       subtree: Dict[str, List[Dict]]) -> Iterator[Tuple[Dict, str]]:
+    """
+    取得済みのフォルダ内容を幅優先でたどり、すべての階層のアイテムを返します。
+    
+    Args:
+        folder_id: 起点のフォルダID
+        local_path: 起点のフォルダに対応するローカルパス
+        subtree: get_subtree_contentsで取得済みのフォルダ内容
+    
+    Yields:
+        Tuple[Dict, str]: (Google Driveのアイテム情報, 対応するローカルパス)
+    """
+    work = deque([(folder_id, local_path)])
+    while work:
+        current_id, current_path = work.popleft()
+        
+        for item in subtree.get(current_id, []):
+            item_path = os.path.join(current_path, item['name'])
+            if item['mimeType'] == 'application/vnd.google-apps.folder':
+                # サブフォルダは後で処理
+                work.append((item['id'], item_path))
+            yield item, item_path
+
+
+def check_for_changes(service, folder_id: str, local_path: str, sync_state: Dict,
+                      creds: Credentials, list_executor: ThreadPoolExecutor) -> bool:
     """
     変更があるかチェックします。
     
@@ -162,66 +666,55 @@ def check_for_changes(service, folder_id: str, local_path: str, sync_state: Dict
         folder_id: フォルダID
         local_path: ローカルパス
         sync_state: 同期状態
+        creds: 認証済みのクレデンシャル（一覧取得のワーカースレッド用）
+        list_executor: 一覧取得用のスレッドプール
     
     Returns:
         bool: 変更がある場合はTrue
     """
     try:
-        # Google Driveの内容を取得
-        drive_items = get_folder_contents(service, folder_id)
-        
-        # ローカルファイルの状態を確認
-        local_items = {}
-        if os.path.exists(local_path):
-            for item in Path(local_path).rglob('*'):
-                if item.is_file():
-                    rel_path = str(item.relative_to(local_path))
-                    local_items[rel_path] = {
-                        'size': item.stat().st_size,
-                        'modified': item.stat().st_mtime,
-                        'hash': get_file_hash(str(item))
-                    }
-        
-        # 変更をチェック
-        for item in drive_items:
-            item_name = item['name']
-            item_id = item['id']
-            item_type = item['mimeType']
+        # 前回の同期以降の変更をChanges APIで確認し、判定できればフォルダ全体の取得を省略
+        remote_changed = check_for_remote_changes(service, sync_state, folder_id, local_path)
+        if remote_changed is not None:
+            if remote_changed:
+                print("Google Drive上の変更を検出")
+                return True
+            return is_synced_file_changed_locally(sync_state, local_path)
+        
+        # Google Driveの内容を取得（サブフォルダの分もまとめて取得）
+        changes_token = get_start_page_token(service)
+        subtree, complete = get_subtree_contents(service, folder_id, creds, list_executor)
+        
+        # ローカルファイルの状態を確認（フォルダ全体を一度だけ走査）
+        local_files = dict(iter_tree(local_path)) if os.path.isdir(local_path) else {}
+        
+        # 変更をチェック（同じパスになるファイルは同期時と同じく最初（最新）のものだけを比較）
+        seen_paths = set()
+        for item, local_file_path in iter_subtree_items(folder_id, local_path, subtree):
+            if item['mimeType'] == 'application/vnd.google-apps.folder':
+                continue
+            if local_file_path in seen_paths:
+                continue
+            seen_paths.add(local_file_path)
             
-            if item_type == 'application/vnd.google-apps.folder':
-                # サブフォルダの場合は再帰的にチェック
-                sub_local_path = os.path.join(local_path, item_name)
-                sub_folder_id = item_id
-                
-                if check_for_changes(service, sub_folder_id, sub_local_path, sync_state):
-                    return True
-            else:
-                # ファイルの変更をチェック
-                local_file_path = os.path.join(local_path, item_name)
-                
-                # ファイルが存在しない、または変更されている場合
-                if not os.path.exists(local_file_path):
-                    print(f"新しいファイルを検出: {item_name}")
-                    return True
-                
-                # サイズや変更日時をチェック
-                local_stat = os.stat(local_file_path)
-                drive_modified = item.get('modifiedTime')
-                
-                if drive_modified:
-                    # ISO形式の日時をパース
-                    drive_time = datetime.fromisoformat(drive_modified.replace('Z', '+00:00'))
-                    local_time = datetime.fromtimestamp(local_stat.st_mtime)
-                    
-                    # 1分以上の差がある場合は変更とみなす
-                    if abs((drive_time - local_time).total_seconds()) > 60:
-                        print(f"ファイルの変更を検出: {item_name}")
-                        return True
-                
-                # サイズの変更をチェック
-                if local_stat.st_size != int(item.get('size', 0)):
-                    print(f"ファイルサイズの変更を検出: {item_name}")
-                    return True
+            # ファイルが存在しない、または変更されている場合
+            local_stat = local_files.get(local_file_path)
+            if local_stat is None:
+                print(f"新しいファイルを検出: {item['name']}")
+                return True
+            
+            # 内容（MD5）や変更日時をチェック
+            if is_file_modified(item, local_file_path, sync_state, local_stat):
+                print(f"ファイルの変更を検出: {item['name']}")
+                return True
+            
+            record_synced_file(sync_state, item, local_file_path)
+        
+        # 変更がなかったので、以降はChanges APIで差分だけを確認する
+        # （一覧取得に失敗したフォルダがある場合は、次回も全体を確認する）
+        if complete:
+            store_changes_token(sync_state, changes_token, folder_id, local_path, subtree)
+            save_sync_state(sync_state)
         
         return False
     
@@ -230,85 +723,238 @@ def check_for_changes(service, folder_id: str, local_path: str, sync_state: Dict
         return True
 
 
-def sync_folder(service, folder_id: str, local_path: str, sync_state: Dict):
+def record_synced_file(sync_state: Dict, item: Dict, local_file_path: str):
+    """
+    Google Drive上のファイルとローカルファイルが同期済みであることを記録します。
+    
+    ダウンロードしたファイルだけでなく、最初から内容が一致していたファイルも記録し、
+    ローカルでの削除・変更を検出できるようにします。
+    
+    Args:
+        sync_state: 同期状態
+        item: Google Driveのアイテム情報
+        local_file_path: ローカルファイルパス
+    """
+    synced = sync_state.get(item['id'])
+    if (synced and synced.get('local_path') == local_file_path and
+            synced.get('modified') == item.get('modifiedTime')):
+        return
+    
+    sync_state[item['id']] = {
+        'name': item['name'],
+        'modified': item.get('modifiedTime'),
+        'size': item.get('size'),
+        'local_path': local_file_path,
+        'synced_at': datetime.now().isoformat()
+    }
+    
+    # Google Workspaceファイルはエクスポートした形式も記録
+    if item['mimeType'].startswith('application/vnd.google-apps.'):
+        sync_state[item['id']]['exported_mime'] = EXPORT_MIME_TYPE
+
+
+def ensure_local_dir(path: str):
+    """
+    ローカルフォルダを作成します（作成済みのフォルダは確認を省略）。
+    
+    Args:
+        path: フォルダパス
+    """
+    if path not in _known_dirs:
+        os.makedirs(path, exist_ok=True)
+        _known_dirs.add(path)
+
+
+def collect_sync_jobs(folder_id: str, local_path: str, subtree: Dict[str, List[Dict]],
+                      sync_state: Dict, local_files: Dict[str, os.stat_result],
+                      downloads: Dict[str, Dict]):
+    """
+    フォルダ以下のローカルフォルダを作成し、ダウンロードが必要なファイルを集めます。
+    
+    Args:
+        folder_id: フォルダID
+        local_path: ローカルパス
+        subtree: get_subtree_contentsで取得済みのフォルダ内容
+        sync_state: 同期状態
+        local_files: iter_treeで取得済みのローカルファイルのstat結果
+        downloads: ローカル保存先パスごとのダウンロード対象のアイテム
+    """
+    # ローカルフォルダを作成
+    ensure_local_dir(local_path)
+    
+    # 処理済みのファイルパス（ダウンロード不要だったものも含む）
+    seen_paths = set()
+    
+    # 各アイテムを処理（親フォルダは子より先に返されるため、順に作成できる）
+    for item, item_path in iter_subtree_items(folder_id, local_path, subtree):
+        if item['mimeType'] == 'application/vnd.google-apps.folder':
+            ensure_local_dir(item_path)
+            continue
+        
+        # 同じパスになるファイルが複数ある場合は最初（最新）のものだけを同期
+        if item_path in seen_paths:
+            continue
+        seen_paths.add(item_path)
+        
+        # ファイルが存在しない、または変更されている場合のみダウンロード
+        local_stat = local_files.get(item_path)
+        if local_stat is None or is_file_modified(item, item_path, sync_state, local_stat):
+            downloads[item_path] = item
+        else:
+            record_synced_file(sync_state, item, item_path)
+
+
+def sync_folder(service, folder_id: str, local_path: str, sync_state: Dict, creds: Credentials,
+                list_executor: ThreadPoolExecutor, download_executor: ThreadPoolExecutor) -> bool:
     """
     フォルダを同期します。
     
+    フォルダ以下のすべての階層からダウンロードが必要なファイルを先に集め、
+    1つのスレッドプールでまとめてダウンロードします。
+    
     Args:
         service: Google Drive APIサービス
         folder_id: フォルダID
         local_path: ローカルパス
         sync_state: 同期状態
+        creds: 認証済みのクレデンシャル（ワーカースレッドのサービス構築用）
+        list_executor: 一覧取得用のスレッドプール
+        download_executor: ダウンロード用のスレッドプール（ワーカー数が同時ダウンロード数）
+    
+    Returns:
+        bool: すべてのファイルを同期できた場合はTrue
     """
     try:
-        # ローカルフォルダを作成
-        os.makedirs(local_path, exist_ok=True)
+        success = True
+        
+        # 一覧取得より前の時点のページトークンを記録し、取得中の変更も次回検出できるようにする
+        changes_token = get_start_page_token(service)
         
-        # Google Driveの内容を取得
-        drive_items = get_folder_contents(service, folder_id)
+        # Google Driveの内容を取得（サブフォルダの分もまとめて取得）
+        subtree, complete = get_subtree_contents(service, folder_id, creds, list_executor)
         
-        # 各アイテムを処理
-        for item in drive_items:
-            item_name = item['name']
-            item_id = item['id']
-            item_type = item['mimeType']
+        # ダウンロードが必要なファイルを集める
+        local_files = dict(iter_tree(local_path)) if os.path.isdir(local_path) else {}
+        downloads = {}
+        collect_sync_jobs(folder_id, local_path, subtree, sync_state, local_files, downloads)
+        
+        # ファイルを並列にダウンロード
+        if downloads:
+            futures = {}
+            for local_file_path, item in downloads.items():
+                print(f"ファイルを同期中: {item['name']}")
+                future = download_executor.submit(download_file_in_thread, creds, item, local_file_path)
+                futures[future] = (item, local_file_path)
             
-            if item_type == 'application/vnd.google-apps.folder':
-                # サブフォルダの場合は再帰的に同期
-                sub_local_path = os.path.join(local_path, item_name)
-                sub_folder_id = item_id
+            # 同期状態の更新はメインスレッドでのみ行う
+            for future in as_completed(futures):
+                item, local_file_path = futures[future]
                 
-                sync_folder(service, sub_folder_id, sub_local_path, sync_state)
-            else:
-                # ファイルの同期
-                local_file_path = os.path.join(local_path, item_name)
-                
-                # ファイルが存在しない、または変更されている場合のみダウンロード
-                if not os.path.exists(local_file_path) or is_file_modified(item, local_file_path):
-                    print(f"ファイルを同期中: {item_name}")
+                if future.result():
+                    # 同期状態を更新
+                    sync_state.pop(item['id'], None)
+                    record_synced_file(sync_state, item, local_file_path)
                     
-                    # ファイルをダウンロード
-                    if download_file(service, item_id, item_name, local_file_path):
-                        # 同期状態を更新
-                        sync_state[item_id] = {
-                            'name': item_name,
-                            'modified': item.get('modifiedTime'),
-                            'size': item.get('size'),
-                            'local_path': local_file_path,
-                            'synced_at': datetime.now().isoformat()
-                        }
+                    # ダウンロードした内容はDrive上のファイルと同じなので、
+                    # md5Checksumをそのままローカルファイルのハッシュ値として記録
+                    if item.get('md5Checksum'):
+                        remember_file_hash(sync_state, local_file_path, item['md5Checksum'])
+                else:
+                    success = False
+        
+        # Google Drive上から消えたファイルの同期状態を削除（別の同期先のファイルは残す）
+        # 一覧取得に失敗したフォルダのファイルを消さないよう、すべて取得できた場合のみ行う
+        if complete:
+            drive_file_ids = {item['id'] for items in subtree.values() for item in items}
+            for item_id in [key for key, entry in sync_state.items()
+                            if isinstance(entry, dict) and 'local_path' in entry and
+                            is_in_local_path(entry['local_path'], local_path)]:
+                if item_id not in drive_file_ids:
+                    del sync_state[item_id]
+        
+        # 一覧取得に失敗したフォルダのファイルは同期できていない
+        if not complete:
+            success = False
+        
+        # すべて同期できた場合のみ、以降はChanges APIで差分だけを確認する
+        if success:
+            store_changes_token(sync_state, changes_token, folder_id, local_path, subtree)
+        else:
+            sync_state.pop('changes_token', None)
+            # ローカルフォルダが削除された可能性があるため、次回は存在を確認し直す
+            _known_dirs.clear()
         
         # 同期状態を保存
         save_sync_state(sync_state)
+        return success
         
     except Exception as e:
         print(f"フォルダの同期中にエラーが発生しました: {e}")
+        return False
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_drive_time(value: str) -> int:
+    """
+    Google DriveのRFC 3339形式の日時（例: 2024-01-02T03:04:05.678Z）を
+    UNIX時間（秒）に変換します（結果は文字列ごとにキャッシュ）。
+    
+    Args:
+        value: Google Driveの日時文字列（UTC）
+    
+    Returns:
+        int: UNIX時間（秒、小数部は切り捨て）
+    """
+    # 固定長の書式なので、datetimeを経由せずに直接切り出す
+    return calendar.timegm((
+        int(value[0:4]), int(value[5:7]), int(value[8:10]),
+        int(value[11:13]), int(value[14:16]), int(value[17:19]),
+        0, 0, 0
+    ))
 
 
-def is_file_modified(drive_item: Dict, local_file_path: str) -> bool:
+def is_file_modified(drive_item: Dict, local_file_path: str, sync_state: Dict,
+                     local_stat: os.stat_result = None) -> bool:
     """
     ファイルが変更されているかチェックします。
     
+    Google Drive上のmd5Checksumがある場合は、ローカルファイルのMD5と比較します。
+    
     Args:
         drive_item: Google Driveのアイテム情報
         local_file_path: ローカルファイルパス
+        sync_state: 同期状態（ローカルファイルのハッシュ値のキャッシュ）
+        local_stat: ローカルファイルのstat結果（省略時は取得）
     
     Returns:
         bool: 変更されている場合はTrue
     """
     try:
-        if not os.path.exists(local_file_path):
-            return True
+        if local_stat is None:
+            if not os.path.exists(local_file_path):
+                return True
+            local_stat = os.stat(local_file_path)
         
-        local_stat = os.stat(local_file_path)
+        if drive_item.get('mimeType', '').startswith('application/vnd.google-apps.'):
+            # Google Workspaceファイルはエクスポートしたファイルと比較できないため、
+            # 前回エクスポートした時点の更新日時と形式を比較
+            synced = sync_state.get(drive_item['id'])
+            return (not synced or
+                    synced.get('modified') != drive_item.get('modifiedTime') or
+                    synced.get('exported_mime') != EXPORT_MIME_TYPE)
+        
+        if drive_item.get('md5Checksum'):
+            # サイズが違えば内容も違うので、ハッシュ値の計算を省略
+            if local_stat.st_size != int(drive_item.get('size', 0)):
+                return True
+            return drive_item['md5Checksum'] != get_cached_file_hash(sync_state, local_file_path, local_stat)
+        
+        # md5Checksumがない場合は変更日時とサイズで判定
         drive_modified = drive_item.get('modifiedTime')
         
         if drive_modified:
-            drive_time = datetime.fromisoformat(drive_modified.replace('Z', '+00:00'))
-            local_time = datetime.fromtimestamp(local_stat.st_mtime)
-            
             # 1分以上の差がある場合は変更とみなす
-            if abs((drive_time - local_time).total_seconds()) > 60:
+            if abs(parse_drive_time(drive_modified) - local_stat.st_mtime) > 60:
                 return True
         
         # サイズの変更をチェック
@@ -321,51 +967,59 @@ def is_file_modified(drive_item: Dict, local_file_path: str) -> bool:
         return True
 
 
-def download_file(service, file_id: str, file_name: str, local_path: str) -> bool:
+def download_file(service, item: Dict, local_path: str) -> bool:
     """
     ファイルをダウンロードします。
     
     Args:
         service: Google Drive APIサービス
-        file_id: ファイルID
-        file_name: ファイル名
+        item: フォルダ内容の一覧で取得したGoogle Driveのアイテム情報
         local_path: ローカル保存先パス
     
     Returns:
         bool: 成功時はTrue、失敗時はFalse
     """
+    file_id = item['id']
+    file_name = item['name']
+    
     try:
-        # ファイルのメタデータを取得
-        file_metadata = service.files().get(fileId=file_id).execute()
-        
         # Google Workspaceファイルの場合はPDFでエクスポート
-        if 'google-apps' in file_metadata.get('mimeType', ''):
+        # （mimeTypeは一覧取得時に取得済みのものを使う）
+        if 'google-apps' in item.get('mimeType', ''):
             print(f"Google Workspaceファイル '{file_name}' をエクスポート中...")
             
             request = service.files().export_media(
                 fileId=file_id,
-                mimeType='application/pdf'
+                mimeType=EXPORT_MIME_TYPE
             )
         else:
             # 通常のファイルの場合は直接ダウンロード
             request = service.files().get_media(fileId=file_id)
         
-        # ファイルをダウンロード
-        import io
-        from googleapiclient.http import MediaIoBaseDownload
-        
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        
-        done = False
-        while done is False:
-            status, done = downloader.next_chunk()
-            if status:
-                print(f"ダウンロード進捗: {int(status.progress() * 100)}%")
-        
-        # ファイルを保存
-        with open(local_path, 'wb') as f:
-            f.write(fh.getvalue())
+        # ファイルをダウンロード（受信したチャンクを一時ファイルに順次書き込む）
+        part_path = local_path + '.part'
+        try:
+            with open(part_path, 'wb') as fh:
+                downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+                
+                done = False
+                while done is False:
+                    status, done = downloader.next_chunk(num_retries=NUM_RETRIES)
+                    if status:
+                        print(f"ダウンロード進捗: {int(status.progress() * 100)}%")
+            
+            # ダウンロードが完了してから置き換え、同期済みのファイルを途中の状態にしない
+            os.replace(part_path, local_path)
+            
+            # 更新日時をGoogle Drive上のファイルに合わせ、次回の変更チェックで比較できるようにする
+            if item.get('modifiedTime'):
+                drive_time = parse_drive_time(item['modifiedTime'])
+                os.utime(local_path, (drive_time, drive_time))
+        except Exception:
+            # 途中まで書き込んだファイルは残さない
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
         
         print(f"ファイル '{file_name}' を同期しました")
         return True
@@ -378,6 +1032,37 @@ def download_file(service, file_id: str, file_name: str, local_path: str) -> boo
         return False
 
 
+def download_file_in_thread(creds: Credentials, item: Dict, local_path: str) -> bool:
+    """
+    ワーカースレッド上でファイルをダウンロードします。
+    
+    Args:
+        creds: 認証済みのクレデンシャル
+        item: Google Driveのアイテム情報
+        local_path: ローカル保存先パス
+    
+    Returns:
+        bool: 成功時はTrue、失敗時はFalse
+    """
+    return download_file(get_thread_service(creds), item, local_path)
+
+
+def positive_int(value: str) -> int:
+    """
+    コマンドライン引数を1以上の整数に変換します。
+    
+    Args:
+        value: 引数の文字列
+    
+    Returns:
+        int: 変換した整数
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"1以上の整数を指定してください: {value}")
+    return number
+
+
 def main():
     """メイン関数"""
     parser = argparse.ArgumentParser(
@@ -399,11 +1084,23 @@ def main():
         default=300,
         help='同期間隔（秒、デフォルト: 300秒 = 5分）'
     )
+    parser.add_argument(
+        '--max-interval',
+        type=int,
+        default=None,
+        help='変更がない間は同期間隔を2倍ずつ延ばす上限（秒、デフォルト: 延ばさない）'
+    )
     parser.add_argument(
         '--once', '-o',
         action='store_true',
         help='一度だけ同期を実行（監視は行わない）'
     )
+    parser.add_argument(
+        '--workers', '-w',
+        type=positive_int,
+        default=DEFAULT_WORKERS,
+        help=f'同時ダウンロード数（デフォルト: {DEFAULT_WORKERS}）'
+    )
     
     args = parser.parse_args()
     
@@ -416,38 +1113,58 @@ def main():
     
     try:
         # Google Drive APIサービスを構築
-        service = build('drive', 'v3', credentials=creds)
+        service = build_drive_service(creds)
         print("Google Drive APIに接続しました。")
         
         # 同期状態を読み込み
         sync_state = load_sync_state()
         
-        if args.once:
-            # 一度だけ同期
-            print(f"フォルダを同期中...")
-            sync_folder(service, args.folder_id, args.local_path, sync_state)
-            print("同期完了")
-        else:
-            # 継続的に監視
-            print(f"フォルダの監視を開始します（間隔: {args.interval}秒）")
-            print(f"ローカルパス: {args.local_path}")
-            print("Ctrl+Cで停止")
-            
-            try:
-                while True:
-                    print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 変更をチェック中...")
-                    
-                    if check_for_changes(service, args.folder_id, args.local_path, sync_state):
-                        print("変更を検出しました。同期を開始...")
-                        sync_folder(service, args.folder_id, args.local_path, sync_state)
-                        print("同期完了")
-                    else:
-                        print("変更はありません")
-                    
-                    time.sleep(args.interval)
-                    
-            except KeyboardInterrupt:
-                print("\n監視を停止しました")
+        # スレッドプールは監視中ずっと使い回し、ワーカースレッドごとのAPIサービス
+        # （とその接続）を同期のたびに作り直さないようにする
+        with ThreadPoolExecutor(max_workers=LIST_WORKERS) as list_executor, \
+                ThreadPoolExecutor(max_workers=args.workers) as download_executor:
+            if args.once:
+                # 一度だけ同期
+                print(f"フォルダを同期中...")
+                sync_folder(service, args.folder_id, args.local_path, sync_state, creds,
+                            list_executor, download_executor)
+                print("同期完了")
+            else:
+                # 継続的に監視
+                max_interval = max(args.max_interval or args.interval, args.interval)
+                if max_interval > args.interval:
+                    print(f"フォルダの監視を開始します（間隔: {args.interval}〜{max_interval}秒）")
+                else:
+                    print(f"フォルダの監視を開始します（間隔: {args.interval}秒）")
+                print(f"ローカルパス: {args.local_path}")
+                print("Ctrl+Cで停止")
+                
+                interval = args.interval
+                try:
+                    while True:
+                        print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 変更をチェック中...")
+                        
+                        changed = check_for_changes(service, args.folder_id, args.local_path, sync_state,
+                                                    creds, list_executor)
+                        if changed:
+                            print("変更を検出しました。同期を開始...")
+                            sync_folder(service, args.folder_id, args.local_path, sync_state, creds,
+                                        list_executor, download_executor)
+                            print("同期完了")
+                            
+                            # 変更があったので、すぐに次の変更を検出できるよう間隔を戻す
+                            interval = args.interval
+                        else:
+                            print("変更はありません")
+                        
+                        time.sleep(interval)
+                        
+                        # 変更がない間は間隔を延ばす（指数バックオフ）
+                        if not changed:
+                            interval = min(interval * 2, max_interval)
+                        
+                except KeyboardInterrupt:
+                    print("\n監視を停止しました")
     
     except HttpError as error:
         print(f"Google Drive APIエラー: {error}")